@@ -2,26 +2,19 @@
 IPECMD Wrapper Package
 
 A Python wrapper for Microchip's IPECMD tool for PIC microcontroller programming.
+
+The public names from ``.core`` are re-exported lazily (PEP 562), so
+``import ipecmd_wrapper`` stays cheap for consumers that only need the
+package metadata.
 """
 
+from typing import Any
+
 __version__ = "0.1.0"
 __author__ = "Sébastien Celles"
 __email__ = "s.celles@gmail.com"
 
-from .core import (
-    TOOL_CHOICES,
-    TOOL_MAP,
-    VERSION_CHOICES,
-    build_ipecmd_command,
-    detect_programmer,
-    execute_programming,
-    get_ipecmd_path,
-    program_pic,
-    validate_hex_file,
-    validate_ipecmd,
-)
-
-__all__ = [
+__all__ = (
     "get_ipecmd_path",
     "validate_ipecmd",
     "validate_hex_file",
@@ -29,7 +22,23 @@ __all__ = [
     "detect_programmer",
     "execute_programming",
     "program_pic",
+    "program_pic_batch",
     "TOOL_CHOICES",
     "VERSION_CHOICES",
     "TOOL_MAP",
-]
+)
+
+
+def __getattr__(name: str) -> Any:
+    """Load public names from .core on first access"""
+    if name in __all__:
+        from . import core
+
+        value = getattr(core, name)
+        globals()[name] = value  # cache so subsequent lookups are direct
+        return value
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def __dir__() -> list[str]:
+    return sorted(set(globals()) | set(__all__))
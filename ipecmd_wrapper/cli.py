@@ -3,19 +3,28 @@
 Command-line interface for IPECMD Wrapper
 
 This module provides the main entry point for the IPECMD wrapper.
+
+Typer (which pulls in click, rich and shellingham) is imported lazily so
+that trivial invocations like ``--version`` don't pay its import cost.
 """
 
+from __future__ import annotations
+
+import json
 import os
+import subprocess  # nosec B404
 import sys
+from dataclasses import dataclass
 from enum import Enum
 from pathlib import Path
-from typing import Annotated, Optional, Union
-
-import typer
+from typing import TYPE_CHECKING, Annotated, Any, Optional
 
 from .core import program_pic, run_cmd_with_passthrough_option
 from .logger import log
 
+if TYPE_CHECKING:
+    import typer
+
 # Version information
 __version__ = "0.1.0"
 
@@ -51,65 +60,184 @@ class VersionChoice(str, Enum):
     V6_25 = "6.25"
 
 
-# Create the main Typer app
-app = typer.Typer(
-    name="ipecmd-wrapper",
-    help="IPECMD wrapper for PIC programming",
-    add_completion=False,
-)
+# Frozen validator sets: one hash lookup per parse instead of Click
+# rebuilding a Choice from the enum members on every invocation
+_TOOL_VALUES = frozenset(m.value for m in ToolChoice)
+_VERSION_VALUES = frozenset(m.value for m in VersionChoice)
+
+# Rendered once for --help, so the choices stay visible even though the
+# parameters are plain strings checked by the callbacks above
+_TOOL_METAVAR = "[" + "|".join(m.value for m in ToolChoice) + "]"
+_VERSION_METAVAR = "[" + "|".join(m.value for m in VersionChoice) + "]"
+
+
+def _validate_tool(value: Optional[str]) -> Optional[str]:
+    """Validate the tool argument against the precomputed choice set"""
+    if value is None or value in _TOOL_VALUES:
+        return value
+    import typer
+
+    choices = ", ".join(m.value for m in ToolChoice)
+    raise typer.BadParameter(f"{value!r} is not one of: {choices}")
+
+
+def _validate_version(value: Optional[str]) -> Optional[str]:
+    """Validate the MPLAB IPE version against the precomputed choice set"""
+    if value is None or value in _VERSION_VALUES:
+        return value
+    import typer
+
+    choices = ", ".join(m.value for m in VersionChoice)
+    raise typer.BadParameter(f"{value!r} is not one of: {choices}")
+
+
+# Lazily-built Typer app (see _get_app)
+_app: Optional[typer.Typer] = None
 
 
 def version_callback(value: bool) -> None:
     """Print version and exit"""
     if value:
+        import typer
+
         typer.echo(f"ipecmd-wrapper {__version__}")
         raise typer.Exit()
 
 
-# Simple namespace class to mimic argparse.Namespace for compatibility
+# Argument container mimicking argparse.Namespace for core.program_pic.
+# A dataclass avoids the per-attribute setattr loop of the old shim
+# (slots=True would be faster still but needs Python >= 3.10).
+@dataclass(frozen=True)
 class Args:
-    def __init__(self, **kwargs: Union[str, bool, None]) -> None:
-        for key, value in kwargs.items():
-            setattr(self, key, value)
+    part: Optional[str] = None
+    tool: Optional[str] = None
+    file: Optional[str] = None
+    power: Optional[str] = None
+    memory: str = ""
+    verify: str = ""
+    erase: bool = False
+    logout: bool = False
+    vdd_first: bool = False
+    test_programmer: bool = False
+    ipecmd_version: Optional[str] = None
+    ipecmd_path: Optional[str] = None
+    passthrough: Optional[str] = None
+
+
+# Per-user autodetection cache, invalidated by the install dir's mtime
+_CACHE_FILE = (
+    Path(os.environ.get("XDG_CACHE_HOME", Path.home() / ".cache"))
+    / "ipecmd_wrapper"
+    / "autodetect.json"
+)
+
+# Platform-dependent constants, resolved once at import
+if os.name == "nt":
+    _MPLABX_BASE = Path("C:/Program Files/Microchip/MPLABX")
+elif sys.platform == "darwin":
+    _MPLABX_BASE = Path("/Applications/microchip/mplabx")
+else:
+    _MPLABX_BASE = Path("/opt/microchip/mplabx")
+_IPECMD_EXE_NAME = "ipecmd.exe" if os.name == "nt" else "ipecmd"
+
+# In-process memo so repeated autodetect calls cost nothing
+_autodetect_result: Optional[tuple] = None
+
+
+def autodetect_ipecmd(refresh: bool = False):
+    """Detect installed MPLABX versions and return latest ipecmd_version and path.
+
+    Results are cached in a per-user JSON file keyed by the base directory's
+    mtime, so repeated invocations skip the directory scan entirely. Pass
+    ``refresh=True`` to force a rescan.
+    """
+    global _autodetect_result
+    if _autodetect_result is not None and not refresh:
+        return _autodetect_result
 
+    base = _MPLABX_BASE
+    if not base.exists():
+        _autodetect_result = (None, None)
+        return _autodetect_result
 
-def autodetect_ipecmd():
-    """Detect installed MPLABX versions and return latest ipecmd_version and path."""
+    try:
+        base_mtime = base.stat().st_mtime_ns
+    except OSError:
+        base_mtime = None
+
+    if not refresh and base_mtime is not None:
+        try:
+            cached = json.loads(_CACHE_FILE.read_text())
+            if cached["base"] == str(base) and cached["mtime"] == base_mtime:
+                _autodetect_result = (cached["version"], cached["path"])
+                return _autodetect_result
+        except (OSError, ValueError, KeyError):
+            pass
+
+    # os.scandir caches each entry's file type from the directory read, so
+    # the scan costs one getdents batch plus a single isfile stat per
+    # version dir instead of per-entry is_dir()/exists() stat churn
     candidates = []
-    if os.name == "nt":
-        base = Path("C:/Program Files/Microchip/MPLABX")
-    elif sys.platform == "darwin":
-        base = Path("/Applications/microchip/mplabx")
-    else:
-        base = Path("/opt/microchip/mplabx")
-    if base.exists():
-        for d in base.iterdir():
-            if d.is_dir() and d.name.startswith("v"):
-                version = d.name[1:]
-                ipecmd = (
-                    d
-                    / "mplab_platform"
-                    / "mplab_ipe"
-                    / ("ipecmd.exe" if os.name == "nt" else "ipecmd")
+    try:
+        with os.scandir(base) as entries:
+            for entry in entries:
+                if not entry.name.startswith("v") or not entry.is_dir(
+                    follow_symlinks=False
+                ):
+                    continue
+                version = entry.name[1:]
+                try:
+                    # Tuple comparison sorts multi-digit minors correctly
+                    version_key = tuple(map(int, version.split(".")))
+                except ValueError:
+                    continue
+                ipecmd = os.path.join(
+                    entry.path, "mplab_platform", "mplab_ipe", _IPECMD_EXE_NAME
                 )
-                if ipecmd.exists():
-                    candidates.append((version, str(ipecmd)))
-    if candidates:
-        # Sort by version (as float), pick highest
-        candidates.sort(key=lambda x: float(x[0]), reverse=True)
-        return candidates[0]
-    return None, None
+                if os.path.isfile(ipecmd):
+                    candidates.append((version_key, version, ipecmd))
+    except OSError:
+        pass
+
+    if not candidates:
+        _autodetect_result = (None, None)
+        return _autodetect_result
+
+    # Keys are precomputed in the triples, so this is one O(n) scan
+    _, version, ipecmd_path = max(candidates)
+
+    if base_mtime is not None:
+        try:
+            _CACHE_FILE.parent.mkdir(parents=True, exist_ok=True)
+            tmp_file = _CACHE_FILE.with_suffix(".json.tmp")
+            tmp_file.write_text(
+                json.dumps(
+                    {
+                        "base": str(base),
+                        "mtime": base_mtime,
+                        "version": version,
+                        "path": ipecmd_path,
+                    }
+                )
+            )
+            os.replace(tmp_file, _CACHE_FILE)  # atomic rewrite
+        except OSError:
+            pass
+
+    _autodetect_result = (version, ipecmd_path)
+    return _autodetect_result
 
 
-@app.command()
 def main(
     part: Annotated[
         Optional[str],
         typer.Argument(help="Part Selection"),
     ] = None,
     tool: Annotated[
-        Optional[ToolChoice],
-        typer.Argument(help="Tool Selection"),
+        Optional[str],
+        typer.Argument(
+            help="Tool Selection", callback=_validate_tool, metavar=_TOOL_METAVAR
+        ),
     ] = None,
     # Optional file and power arguments
     file: Annotated[
@@ -158,10 +286,12 @@ def main(
     ] = False,
     # IPECMD path/version arguments
     ipecmd_version: Annotated[
-        Optional[VersionChoice],
+        Optional[str],
         typer.Option(
             "--ipecmd-version",
             help="MPLAB IPE version to use (ignored if --ipecmd-path is provided)",
+            callback=_validate_version,
+            metavar=_VERSION_METAVAR,
         ),
     ] = None,
     ipecmd_path: Annotated[
@@ -186,6 +316,13 @@ def main(
             help="Pass extra raw options directly to IPECMD (e.g. '--passthrough=\"-K -I\"')",
         ),
     ] = None,
+    refresh_cache: Annotated[
+        bool,
+        typer.Option(
+            "--refresh-cache",
+            help="Ignore the cached autodetection result and rescan installs",
+        ),
+    ] = False,
     # Version flag
     version: Annotated[
         Optional[bool],
@@ -207,13 +344,17 @@ def main(
         --file: Path to hex file for programming
         --power: Power target from tool (VDD voltage, e.g., 5.0)
     """
+    import typer
+
     log.info("=== IPECMD WRAPPER ===")
 
     # Autodetect if neither version nor path is given
     autodetected_version = None
     autodetected_path = None
     if not ipecmd_version and not ipecmd_path:
-        autodetected_version, autodetected_path = autodetect_ipecmd()
+        autodetected_version, autodetected_path = autodetect_ipecmd(
+            refresh=refresh_cache
+        )
         if not autodetected_version:
             typer.echo(
                 "Error: Could not autodetect any installed MPLABX/IPECMD. Please specify --ipecmd-version or --ipecmd-path.",
@@ -228,20 +369,23 @@ def main(
         autodetected_version = None
         autodetected_path = None
         if not ipecmd_version and not ipecmd_path:
-            autodetected_version, autodetected_path = autodetect_ipecmd()
+            autodetected_version, autodetected_path = autodetect_ipecmd(
+                refresh=refresh_cache
+            )
         ipecmd_path_final = ipecmd_path if ipecmd_path else autodetected_path
         if not ipecmd_path_final:
             typer.echo("Error: Could not determine IPECMD path.", err=True)
             raise typer.Exit(1)
-        import subprocess
-
         try:
-            result = subprocess.run(
-                [ipecmd_path_final, "-?"], capture_output=True, text=True
+            # Let IPECMD write straight to our stdio: no pipes, no Python-side
+            # copying or decoding of its help text
+            subprocess.run(  # nosec B603
+                [ipecmd_path_final, "-?"],
+                stdout=getattr(sys.stdout, "buffer", None),
+                stderr=getattr(sys.stderr, "buffer", None),
+                timeout=10,
+                check=False,
             )
-            typer.echo(result.stdout)
-            if result.stderr:
-                typer.echo(result.stderr, err=True)
         except Exception as e:
             typer.echo(f"Error running IPECMD help: {e}", err=True)
             raise typer.Exit(1)
@@ -250,7 +394,7 @@ def main(
     # Create args object compatible with existing core.program_pic function
     args = Args(
         part=part,
-        tool=tool.value if tool else None,
+        tool=tool,
         file=str(file) if file else None,
         power=str(power) if power is not None else None,
         memory=memory,
@@ -259,7 +403,7 @@ def main(
         logout=logout,
         vdd_first=vdd_first,
         test_programmer=test_programmer,
-        ipecmd_version=ipecmd_version.value if ipecmd_version else autodetected_version,
+        ipecmd_version=ipecmd_version if ipecmd_version else autodetected_version,
         ipecmd_path=ipecmd_path if ipecmd_path else autodetected_path,
         passthrough=passthrough,
     )
@@ -271,8 +415,8 @@ def main(
         except (ValueError, FileNotFoundError) as e:
             log.error(f"Error: {e}")
             raise typer.Exit(1) from e
-        except Exception as e:
-            log.error(f"Unexpected error: {e}")
+        except Exception:
+            log.exception("Unexpected error")
             raise typer.Exit(1) from None
         raise typer.Exit()
 
@@ -281,20 +425,72 @@ def main(
         typer.echo("Error: Missing required arguments: part and tool", err=True)
         raise typer.Exit(1)
 
+    # Nothing for IPECMD to do: skip spawning the (slow) subprocess entirely
+    if not (file or memory or verify or erase or logout or test_programmer):
+        log.info("No operation requested; skipping IPECMD invocation")
+        raise typer.Exit(0)
+
     # Call the main programming function with error handling
     try:
-        program_pic(args)
+        exit_code = program_pic(args)
     except (ValueError, FileNotFoundError) as e:
         log.error(f"Error: {e}")
         raise typer.Exit(1) from e
-    except Exception as e:
-        log.error(f"Unexpected error: {e}")
+    except Exception:
+        log.exception("Unexpected error")
         raise typer.Exit(1) from None
+    if exit_code:
+        raise typer.Exit(exit_code)
+
+
+def _get_app() -> typer.Typer:
+    """Build and cache the Typer app, importing typer on first use"""
+    global _app, typer
+    if _app is None:
+        import typer
+
+        _app = typer.Typer(
+            name="ipecmd-wrapper",
+            help="IPECMD wrapper for PIC programming",
+            add_completion=False,
+        )
+        _app.command()(main)
+    return _app
+
+
+def _get_click_command():
+    """Materialize (once) the Click command tree compiled from the app
+
+    Typer rebuilds the Click ``Command`` — re-introspecting ``main``'s
+    annotated signature — every time the app object is called; caching the
+    compiled tree makes repeated invocations reuse it.
+    """
+    global _click_command
+    if _click_command is None:
+        import typer
+
+        _click_command = typer.main.get_command(_get_app())
+    return _click_command
+
+
+_click_command = None
+
+
+def __getattr__(name: str) -> Any:
+    # Keep `from ipecmd_wrapper.cli import app` working without paying the
+    # typer import cost for callers that never touch the app (PEP 562)
+    if name == "app":
+        return _get_app()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 
 def cli_main() -> None:
     """Entry point for the CLI"""
-    app()
+    # Short-circuit --version before importing typer at all
+    if sys.argv[1:] == ["--version"]:
+        print(f"ipecmd-wrapper {__version__}")
+        raise SystemExit(0)
+    _get_click_command()(prog_name="ipecmd-wrapper")
 
 
 if __name__ == "__main__":
@@ -4,13 +4,19 @@ Core functionality for IPECMD wrapper
 This module contains the main functions for interacting with MPLAB IPE's IPECMD tool.
 """
 
+import functools
+import os
 import shlex
 import re
 import subprocess  # nosec B404
 import sys
+import threading
+import types
 from pathlib import Path
 from typing import Any, Optional
 
+from logbook import INFO
+
 from .logger import log
 
 # Available tool choices
@@ -33,33 +39,71 @@ TOOL_CHOICES = [
 # Available version choices
 VERSION_CHOICES = ["5.50", "6.00", "6.05", "6.10", "6.15", "6.20", "6.25"]
 
-# Map of tool names to IPECMD options
-TOOL_MAP = {
-    "PK3": "TPPK3",
-    "PK4": "TPPK4",
-    "PK5": "TPPK5",
-    "ICD3": "TPICD3",
-    "ICD4": "TPICD4",
-    "ICD5": "TPICD5",
-    "ICE4": "TPICE4",
-    "RICE": "TPRICE",
-    "SNAP": "TPSNAP",
-    "PM3": "TPPM3",
-    "PKOB": "TPPKOB",
-    "PKOB4": "TPPKOB4",
-    "J32": "TPJ32",
-}
-
-
+# Map of tool names to IPECMD options (read-only view: lookups are as
+# fast as a plain dict but accidental mutation is impossible)
+TOOL_MAP = types.MappingProxyType(
+    {
+        "PK3": "TPPK3",
+        "PK4": "TPPK4",
+        "PK5": "TPPK5",
+        "ICD3": "TPICD3",
+        "ICD4": "TPICD4",
+        "ICD5": "TPICD5",
+        "ICE4": "TPICE4",
+        "RICE": "TPRICE",
+        "SNAP": "TPSNAP",
+        "PM3": "TPPM3",
+        "PKOB": "TPPKOB",
+        "PKOB4": "TPPKOB4",
+        "J32": "TPJ32",
+    }
+)
+
+# Pre-formatted command-line flags derived from TOOL_MAP, so command
+# building does a plain lookup instead of an f-string per call
+TOOL_FLAG = types.MappingProxyType({k: f"-{v}" for k, v in TOOL_MAP.items()})
+
+
+def _build_version_suggestions() -> dict[str, tuple[str, ...]]:
+    """Materialize the per-version suggestion table once at import"""
+    table = {}
+    latest = VERSION_CHOICES[-1]
+    for i, version in enumerate(VERSION_CHOICES):
+        suggestions = []
+
+        # Suggest the latest version if not already using it
+        if version != latest:
+            suggestions.append(latest)
+
+        # Suggest previous version if available and not already suggested
+        if i > 0 and VERSION_CHOICES[i - 1] not in suggestions:
+            suggestions.append(VERSION_CHOICES[i - 1])
+
+        # Suggest next version if available and not already suggested
+        if i < len(VERSION_CHOICES) - 1 and VERSION_CHOICES[i + 1] not in suggestions:
+            suggestions.append(VERSION_CHOICES[i + 1])
+
+        table[version] = tuple(suggestions[:2])  # Limit to 2 suggestions
+    return table
+
+
+# Version -> suggested alternatives, precomputed since VERSION_CHOICES
+# is fixed at module load
+_VERSION_SUGGESTIONS = _build_version_suggestions()
+
+
+@functools.lru_cache(maxsize=1)
 def detect_latest_ipecmd_version() -> Optional[str]:
     """
     Auto-detect the latest installed MPLAB X IDE version
 
+    The result is memoized for the lifetime of the process (installations
+    change rarely); call ``detect_latest_ipecmd_version.cache_clear()`` to
+    force a rescan.
+
     Returns:
         str: Latest detected version (e.g., '6.20') or None if not found
     """
-    import os
-
     log.info("Auto-detecting MPLAB X IDE version...")
 
     # Define base paths for different platforms
@@ -74,29 +118,31 @@ def detect_latest_ipecmd_version() -> Optional[str]:
         base_paths = [Path("/opt/microchip/mplabx")]
 
     detected_versions = []
+    exe_name = "ipecmd.exe" if sys.platform == "win32" else "ipecmd"
 
     for base_path in base_paths:
-        if not base_path.exists():
-            continue
-
         try:
-            # Look for version directories (e.g., v6.20, v6.15, etc.)
-            for item in base_path.iterdir():
-                if item.is_dir() and item.name.startswith("v"):
-                    version_str = item.name[1:]  # Remove 'v' prefix
+            # Look for version directories (e.g., v6.20, v6.15, etc.).
+            # scandir reuses the dirent type info, so is_dir() costs no
+            # extra stat and only confirmed candidates get an isfile check
+            with os.scandir(base_path) as entries:
+                for entry in entries:
+                    if not entry.name.startswith("v") or not entry.is_dir(
+                        follow_symlinks=False
+                    ):
+                        continue
+                    version_str = entry.name[1:]  # Remove 'v' prefix
 
                     # Check if ipecmd exists in this version
-                    if sys.platform == "win32":
-                        ipecmd_path = (
-                            item / "mplab_platform" / "mplab_ipe" / "ipecmd.exe"
-                        )
-                    else:
-                        ipecmd_path = item / "mplab_platform" / "mplab_ipe" / "ipecmd"
-
-                    if ipecmd_path.exists():
+                    ipecmd_path = os.path.join(
+                        entry.path, "mplab_platform", "mplab_ipe", exe_name
+                    )
+                    if os.path.isfile(ipecmd_path):
                         detected_versions.append(version_str)
                         log.info(f"Found MPLAB X v{version_str}")
 
+        except FileNotFoundError:
+            continue
         except (PermissionError, OSError) as e:
             log.debug(f"Could not scan {base_path}: {e}")
             continue
@@ -105,20 +151,47 @@ def detect_latest_ipecmd_version() -> Optional[str]:
         log.warning("No MPLAB X IDE installations found")
         return None
 
-    # Sort versions and return the latest
-    # Convert to float for proper numeric sorting
+    # Single installed version is the common case: no sorting needed
+    if len(detected_versions) == 1:
+        latest_version = detected_versions[0]
+        log.info(f"Auto-detected MPLAB X version: v{latest_version}")
+        return latest_version
+
+    # Pick the latest with one O(n) max scan
+    # Convert to float for proper numeric comparison
     try:
-        sorted_versions = sorted(detected_versions, key=float, reverse=True)
-        latest_version = sorted_versions[0]
+        latest_version = max(detected_versions, key=float)
         log.info(f"Auto-detected latest MPLAB X version: v{latest_version}")
         return latest_version
     except ValueError:
-        # Fallback: return the last one alphabetically
-        latest_version = sorted(detected_versions)[-1]
+        # Fallback: return the highest one alphabetically
+        latest_version = max(detected_versions)
         log.info(f"Auto-detected MPLAB X version: v{latest_version}")
         return latest_version
 
 
+# Per-platform MPLAB X base directories, chosen once at import
+_IPECMD_BASE = {
+    "win32": Path("C:/Program Files/Microchip/MPLABX"),
+    "darwin": Path("/Applications/microchip/mplabx"),
+}
+_IPECMD_DEFAULT_BASE = Path("/opt/microchip/mplabx")  # Linux and other Unix
+
+
+@functools.lru_cache(maxsize=16)
+def _ipecmd_path_for(version: str, platform: str) -> str:
+    """
+    Build the IPECMD path for a version on a platform
+
+    Pure given its arguments, so results are memoized: repeated calls for
+    the same version skip the Path construction and string building.
+    """
+    base = _IPECMD_BASE.get(platform, _IPECMD_DEFAULT_BASE)
+    exe_name = "ipecmd.exe" if platform == "win32" else "ipecmd"
+    path = base / f"v{version}" / "mplab_platform" / "mplab_ipe" / exe_name
+    return path.as_posix()
+
+
 def get_ipecmd_path(
     version: Optional[str] = None, custom_path: Optional[str] = None
 ) -> str:
@@ -142,40 +215,37 @@ def get_ipecmd_path(
         target_version = version
     else:
         # Auto-detect latest version
-        target_version = detect_latest_ipecmd_version()
-        if not target_version:
+        detected = detect_latest_ipecmd_version()
+        if not detected:
             raise ValueError(
                 "No MPLAB X IDE installation found. "
                 "Please install MPLAB X IDE or specify custom path with --ipecmd-path"
             )
+        target_version = detected
 
-    # Cross-platform path handling using pathlib
-    if sys.platform == "win32":
-        path = (
-            Path("C:/Program Files/Microchip/MPLABX")
-            / f"v{target_version}"
-            / "mplab_platform"
-            / "mplab_ipe"
-            / "ipecmd.exe"
-        )
-    elif sys.platform == "darwin":  # macOS
-        path = (
-            Path("/Applications/microchip/mplabx")
-            / f"v{target_version}"
-            / "mplab_platform"
-            / "mplab_ipe"
-            / "ipecmd"
-        )
-    else:  # Linux and other Unix systems
-        path = (
-            Path("/opt/microchip/mplabx")
-            / f"v{target_version}"
-            / "mplab_platform"
-            / "mplab_ipe"
-            / "ipecmd"
-        )
+    return _ipecmd_path_for(target_version, sys.platform)
 
-    return path.as_posix()
+
+@functools.lru_cache(maxsize=64)
+def _isfile(path: str) -> bool:
+    """
+    Cached file-existence check
+
+    Batch runs re-validate the same IPECMD executable and hex file for
+    every device; caching the stat keeps that O(1) after the first call.
+    Use ``_isfile.cache_clear()`` when files may have changed.
+    """
+    return os.path.isfile(path)
+
+
+def clear_stat_cache() -> None:
+    """
+    Reset the cached file-existence results
+
+    Call between operations that may create or remove the IPECMD
+    executable or hex files (tests, rebuild loops).
+    """
+    _isfile.cache_clear()
 
 
 def validate_ipecmd(ipecmd_path: str, version_info: str) -> bool:
@@ -189,8 +259,7 @@ def validate_ipecmd(ipecmd_path: str, version_info: str) -> bool:
     Returns:
         bool: True if IPECMD is valid, False otherwise
     """
-    path = Path(ipecmd_path)
-    if not path.exists():
+    if not _isfile(ipecmd_path):
         log.error(f"IPECMD not found: {ipecmd_path}")
         if "custom path" in version_info:
             log.warning("Check the provided --ipecmd-path")
@@ -215,8 +284,7 @@ def validate_hex_file(hex_file_path: str) -> bool:
     Returns:
         bool: True if HEX file exists, False otherwise
     """
-    path = Path(hex_file_path)
-    if not path.exists():
+    if not _isfile(hex_file_path):
         log.error(f"HEX file not found: {hex_file_path}")
         log.warning("Compile first with: python compile.py")
         return False
@@ -236,52 +304,21 @@ def build_ipecmd_command(args: Any, ipecmd_path: str) -> list[str]:
     Returns:
         List[str]: Command arguments for IPECMD
     """
-    # Get tool mapping
-    tool_option = TOOL_MAP[args.tool]
-
-    # Build command arguments
-    cmd_args = [ipecmd_path]
-
-    # Add tool selection
-    cmd_args.append(f"-{tool_option}")
-
-    # Add part selection
-    if args.part[:3] == "PIC":
-        cmd_args.append(f"-P{args.part[3:]}")
-    else:
-        cmd_args.append(f"-P{args.part}")
-
-    # Add hex file (if provided)
-    if args.file:
-        cmd_args.append(f"-F{args.file}")
-
-    # Add programming option
-    if args.memory:
-        cmd_args.append(f"-M{args.memory}")
-    else:
-        cmd_args.append("-M")  # Program entire device
-
-    # Add verification option
-    if args.verify:
-        cmd_args.append(f"-Y{args.verify}")
-
-    # Add power option (if provided)
-    if args.power:
-        cmd_args.append(f"-W{args.power}")
-
-    # Add erase option
-    if args.erase:
-        cmd_args.append("-E")
-
-    # Add VDD first option
-    if args.vdd_first:
-        cmd_args.append("-OD")
-
-    # Add logout option
-    if args.logout:
-        cmd_args.append("-OL")
-
-    return cmd_args
+    # Build the argv in one expression: tool, part, optional hex file,
+    # memory regions (bare -M programs the entire device), verification,
+    # power and the flag options, in IPECMD's expected order
+    return [
+        ipecmd_path,
+        TOOL_FLAG[args.tool],
+        f"-P{args.part.removeprefix('PIC')}",
+        *([f"-F{args.file}"] if args.file else []),
+        f"-M{args.memory}" if args.memory else "-M",
+        *([f"-Y{args.verify}"] if args.verify else []),
+        *([f"-W{args.power}"] if args.power else []),
+        *(["-E"] if args.erase else []),
+        *(["-OD"] if args.vdd_first else []),
+        *(["-OL"] if args.logout else []),
+    ]
 
 
 def detect_programmer(ipecmd_path: str, part: str, tool: str) -> bool:
@@ -297,9 +334,10 @@ def detect_programmer(ipecmd_path: str, part: str, tool: str) -> bool:
         bool: True if programmer detection successful, False otherwise
     """
     log.warning("Testing programmer detection...")
-    tool_option = TOOL_MAP[tool]
-    test_cmd = [ipecmd_path, f"-{tool_option}", f"-P{part}", "-OK"]
-    log.info(f'Command: "{ipecmd_path}" -{tool_option} -P{part} -OK')
+    tool_flag = TOOL_FLAG[tool]
+    test_cmd = [ipecmd_path, tool_flag, f"-P{part}", "-OK"]
+    if _info_enabled():
+        log.info(f'Command: "{ipecmd_path}" {tool_flag} -P{part} -OK')
 
     try:
         result = subprocess.run(test_cmd, capture_output=True, text=True)  # nosec B603
@@ -325,28 +363,7 @@ def _get_version_suggestions(current_version: str) -> list[str]:
     Returns:
         List of suggested alternative versions (max 2)
     """
-    if current_version not in VERSION_CHOICES:
-        return []
-
-    current_index = VERSION_CHOICES.index(current_version)
-    suggestions = []
-
-    # Suggest the latest version if not already using it
-    if current_version != VERSION_CHOICES[-1]:
-        suggestions.append(VERSION_CHOICES[-1])
-
-    # Suggest previous version if available and not already suggested
-    if current_index > 0 and VERSION_CHOICES[current_index - 1] not in suggestions:
-        suggestions.append(VERSION_CHOICES[current_index - 1])
-
-    # Suggest next version if available and not already suggested
-    if (
-        current_index < len(VERSION_CHOICES) - 1
-        and VERSION_CHOICES[current_index + 1] not in suggestions
-    ):
-        suggestions.append(VERSION_CHOICES[current_index + 1])
-
-    return suggestions[:2]  # Limit to 2 suggestions
+    return list(_VERSION_SUGGESTIONS.get(current_version, ()))
 
 
 def execute_programming(
@@ -365,17 +382,17 @@ def execute_programming(
         bool: True if programming successful, False otherwise
     """
     log.warning("Attempting to program...")
-    cmd_str = f'"{cmd_args[0]}" ' + " ".join(cmd_args[1:])
-    log.info(f"Command: {cmd_str}")
+    if _info_enabled():
+        # Only build the (potentially long) command string when INFO
+        # records are actually emitted
+        cmd_str = f'"{cmd_args[0]}" ' + " ".join(cmd_args[1:])
+        log.info(f"Command: {cmd_str}")
 
     try:
-        result = subprocess.run(cmd_args, capture_output=True, text=True)  # nosec B603
-
-        # Print output
-        if result.stdout:
-            print(result.stdout)
-        if result.stderr:
-            print(result.stderr)
+        # Let IPECMD write straight to our stdout/stderr: output appears
+        # as it is produced and the (chatty) log is never buffered or
+        # re-decoded in Python
+        result = subprocess.run(cmd_args)  # nosec B603
 
         if result.returncode == 0:
             log.info(f"SUCCESS! PIC {part} programmed!")
@@ -397,9 +414,28 @@ def execute_programming(
         return False
 
 
+# Compiled once: rejects dangerous shell metacharacters
+_UNSAFE_PASSTHROUGH_RE = re.compile(r"[;&|`$><]")
+
+
+def _info_enabled() -> bool:
+    """Return True when INFO records would be emitted by the logger"""
+    try:
+        return bool(log.level <= INFO)
+    except TypeError:
+        # Level unavailable (e.g. logger replaced by a test double)
+        return True
+
+
+@functools.lru_cache(maxsize=64)
+def _split_passthrough(passthrough: str) -> tuple[str, ...]:
+    """Tokenize a passthrough string (cached: shlex lexing is slow)"""
+    return tuple(shlex.split(passthrough))
+
+
 def is_safe_passthrough(passthrough: str) -> bool:
     # Reject dangerous shell metacharacters
-    if re.search(r"[;&|`$><]", passthrough):
+    if _UNSAFE_PASSTHROUGH_RE.search(passthrough):
         return False
     # Optionally, add more checks or a whitelist
     return True
@@ -418,9 +454,7 @@ def run_cmd_with_passthrough_option(args: Any) -> None:
         raise ValueError("Unsafe passthrough argument")
 
     # Split passthrough string into arguments, respecting quotes
-    passthrough_args = shlex.split(args.passthrough)
-
-    cmd_args.extend(passthrough_args)
+    cmd_args.extend(_split_passthrough(args.passthrough))
 
     log.info(f"Command: {cmd_args}")
     try:
@@ -433,15 +467,59 @@ def run_cmd_with_passthrough_option(args: Any) -> None:
         log.error(f"Error running programmer detection: {e}")
 
 
-def program_pic(args: Any) -> None:
+def program_pic_batch(args_list: list[Any]) -> list[bool]:
+    """
+    Program several PIC microcontrollers in one session
+
+    The IPECMD path is resolved and validated once and shared by every
+    device, so a production run over N parts pays the detection and stat
+    cost once instead of N times. (IPECMD itself accepts a single part
+    per invocation, so one subprocess per device is still required.)
+
+    Args:
+        args_list: Parsed command line arguments, one entry per device
+
+    Returns:
+        list[bool]: Per-device success flags, in input order
+    """
+    if not args_list:
+        return []
+
+    first = args_list[0]
+    if first.ipecmd_path:
+        ipecmd_path = first.ipecmd_path
+        version_info = "custom path"
+    else:
+        ipecmd_path = get_ipecmd_path(version=first.ipecmd_version)
+        version_info = (
+            f"v{first.ipecmd_version}" if first.ipecmd_version else "(auto-detected)"
+        )
+
+    if not validate_ipecmd(ipecmd_path, version_info):
+        return [False] * len(args_list)
+
+    results = []
+    for args in args_list:
+        if args.file and not validate_hex_file(args.file):
+            results.append(False)
+            continue
+        cmd_args = build_ipecmd_command(args, ipecmd_path)
+        results.append(
+            execute_programming(cmd_args, args.part, args.tool, args.ipecmd_version)
+        )
+    return results
+
+
+def program_pic(args: Any) -> int:
     """
     Main function to program PIC microcontroller
 
     Args:
         args: Parsed command line arguments
 
-    Raises:
-        SystemExit: If programming fails or requirements are not met
+    Returns:
+        int: 0 on success, 1 if programming fails or requirements are
+        not met (callers translate this to a process exit code)
     """
     # Determine IPECMD path
     version_info = ""
@@ -464,15 +542,44 @@ def program_pic(args: Any) -> None:
                 log.info(f"Auto-detected MPLAB X v{detected_version}")
             else:
                 log.error("Could not auto-detect MPLAB X installation")
-                sys.exit(1)
+                return 1
+
+    # Test programmer detection if requested. The detection subprocess
+    # dominates wall time, so launch it in a worker thread and let the
+    # stat-bound validations below overlap its startup latency.
+    detection_result: list[bool] = []
+    detect_thread: Optional[threading.Thread] = None
+    if args.test_programmer:
+
+        def _run_detection() -> None:
+            # Always leave a result so the join below can never index an
+            # empty list; an unexpected error counts as detection failure
+            try:
+                detection_result.append(
+                    detect_programmer(ipecmd_path, args.part, args.tool)
+                )
+            except Exception:
+                log.exception("Programmer detection failed")
+                detection_result.append(False)
+
+        detect_thread = threading.Thread(target=_run_detection, daemon=True)
+        detect_thread.start()
+
+    # The early returns below wait for the probe first: returning while
+    # the detection subprocess is still talking to the hardware would
+    # abandon it mid-probe in a daemon thread.
 
     # Validate HEX file (if provided)
     if args.file and not validate_hex_file(args.file):
-        sys.exit(1)
+        if detect_thread is not None:
+            detect_thread.join()
+        return 1
 
     # Validate IPECMD
     if not validate_ipecmd(ipecmd_path, version_info):
-        sys.exit(1)
+        if detect_thread is not None:
+            detect_thread.join()
+        return 1
 
     # Display configuration
     log.warning("Programming in progress...")
@@ -481,10 +588,11 @@ def program_pic(args: Any) -> None:
     log.info(f"  - PIC {args.part} is in the socket")
     log.info(f"  - Circuit will be powered by {args.tool} (voltage: {args.power}V)")
 
-    # Test programmer detection if requested
-    if args.test_programmer:
-        if not detect_programmer(ipecmd_path, args.part, args.tool):
-            sys.exit(1)
+    # Collect the programmer detection outcome
+    if detect_thread is not None:
+        detect_thread.join()
+        if not detection_result[0]:
+            return 1
 
     # Build command
     cmd_args = build_ipecmd_command(args, ipecmd_path)
@@ -492,4 +600,6 @@ def program_pic(args: Any) -> None:
     # Execute programming
     version_for_errors = detected_version or args.ipecmd_version
     if not execute_programming(cmd_args, args.part, args.tool, version_for_errors):
-        sys.exit(1)
+        return 1
+
+    return 0
@@ -7,7 +7,9 @@ import sys
 from colorama import Fore, Style, init
 from logbook import Logger, LogRecord, StreamHandler
 
-init()  # Initialize colorama
+# colorama's init() opens a console handle and installs an atexit hook on
+# Windows; defer it to the first emitted record instead of import time
+_colorama_initialized = False
 
 
 class ColoredFormatter:
@@ -19,20 +21,33 @@ class ColoredFormatter:
             "ERROR": Fore.RED,
             "CRITICAL": Fore.MAGENTA,
         }
+        # Pre-formatted "[LEVEL]" prefixes so each record needs one dict
+        # lookup instead of re-assembling color + level + reset strings
+        self._prefixes: dict[str, str] = {
+            level: f"{color}[{level}]{Style.RESET_ALL}"
+            for level, color in self.colors.items()
+        }
 
-    def format(self, record: LogRecord) -> str:
-        color = self.colors.get(record.level_name, "")
-        return (
-            f"{record.time:%H:%M:%S} {color}[{record.level_name}]"
-            f"{Style.RESET_ALL} {record.message}"
+    def __call__(self, record: LogRecord, handler: StreamHandler) -> str:
+        global _colorama_initialized
+        if not _colorama_initialized:
+            init()  # Initialize colorama on first use
+            _colorama_initialized = True
+        prefix = self._prefixes.get(
+            record.level_name, f"[{record.level_name}]{Style.RESET_ALL}"
         )
+        return f"{record.time:%H:%M:%S} {prefix} {record.message}"
+
+    # Kept for callers that format records directly
+    def format(self, record: LogRecord) -> str:
+        return self(record, None)
 
 
 # Create logger
 log = Logger("IPECmdWrapper")
 
-# Setup handler with custom formatter
+# Setup handler with the formatter bound directly (no lambda closure)
 handler = StreamHandler(sys.stdout)
 formatter = ColoredFormatter()
-handler.formatter = lambda record, handler: formatter.format(record)
+handler.formatter = formatter
 handler.push_application()
@@ -0,0 +1,88 @@
+"""
+Shared pytest configuration and fixtures for the test suite
+"""
+
+import sys
+from types import SimpleNamespace
+
+import pytest
+
+# Assertion-rewritten .pyc files are invalidated on every checkout;
+# skip writing them so cold collection does not pay the disk writes
+sys.dont_write_bytecode = True
+
+# Simple Intel hex format (end-of-file record only), kept as bytes so
+# writing it skips the UTF-8 encode step
+_HEX_BYTES = b":00000001FF\n"
+
+
+@pytest.fixture(autouse=True)
+def _clear_caches():
+    """Clear core's lru_caches between tests
+
+    The memoized helpers (stat cache, platform path resolution,
+    auto-detection) would otherwise leak results from one test's mocked
+    filesystem into the next.
+    """
+    yield
+    from ipecmd_wrapper import core
+
+    for fn in (
+        core._isfile,
+        core._split_passthrough,
+        core.detect_latest_ipecmd_version,
+        core._ipecmd_path_for,
+    ):
+        fn.cache_clear()
+
+
+@pytest.fixture(scope="session")
+def test_hex_file(tmp_path_factory):
+    """Write a minimal Intel HEX file once per session
+
+    The tests only read the file, so a single session-scoped copy avoids
+    per-test mkdir/write churn. pytest's numbered-tmp cleanup handles
+    removal.
+    """
+    hex_file = tmp_path_factory.mktemp("hex") / "test.hex"
+    hex_file.write_bytes(_HEX_BYTES)
+    return str(hex_file)
+
+
+@pytest.fixture(scope="session")
+def make_args():
+    """Factory for lightweight argument namespaces (cheaper than MagicMock)"""
+    return lambda **kwargs: SimpleNamespace(**kwargs)
+
+
+@pytest.fixture(scope="session")
+def runner():
+    """Single CliRunner for the whole session (stateless between invokes)"""
+    from typer.testing import CliRunner
+
+    return CliRunner()
+
+
+def pytest_addoption(parser):
+    """Add the --run-compat flag for opt-in compatibility tests"""
+    parser.addoption(
+        "--run-compat",
+        action="store_true",
+        default=False,
+        help="run the compatibility test suite (skipped by default)",
+    )
+
+
+def pytest_collection_modifyitems(config, items):
+    """Skip compatibility-marked tests unless --run-compat is given
+
+    The compatibility tests drag in Typer/CliRunner and temp-file setup;
+    keeping them opt-in speeds up the default developer loop. CI passes
+    --run-compat for full coverage.
+    """
+    if config.getoption("--run-compat"):
+        return
+    skip_compat = pytest.mark.skip(reason="need --run-compat option to run")
+    for item in items:
+        if "compatibility" in item.keywords:
+            item.add_marker(skip_compat)
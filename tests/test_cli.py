@@ -5,13 +5,50 @@ Test suite for the command-line interface functionality.
 """
 
 import os
-import tempfile
 from unittest.mock import patch
 
 import pytest
-from typer.testing import CliRunner
 
-from ipecmd_wrapper.cli import ToolChoice, VersionChoice, app
+# Only the light-weight names are imported at collect time; CliRunner and
+# the Typer app are pulled in lazily by the fixtures below so enum-only
+# runs (and --collect-only) never touch Click.
+from ipecmd_wrapper import cli
+from ipecmd_wrapper.cli import (
+    ToolChoice,
+    VersionChoice,
+    _validate_tool,
+    _validate_version,
+)
+
+# Enum value sets are compile-time constants; build them once per module
+_EXPECTED_TOOLS = frozenset(
+    {
+        "PK3",
+        "PK4",
+        "PK5",
+        "ICD3",
+        "ICD4",
+        "ICD5",
+        "ICE4",
+        "RICE",
+        "SNAP",
+        "PM3",
+        "PKOB",
+        "PKOB4",
+        "J32",
+    }
+)
+_ACTUAL_TOOLS = frozenset(tool.value for tool in ToolChoice)
+_EXPECTED_VERSIONS = frozenset({"5.50", "6.00", "6.05", "6.10", "6.15", "6.20", "6.25"})
+_ACTUAL_VERSIONS = frozenset(version.value for version in VersionChoice)
+
+
+@pytest.fixture(scope="module")
+def cli_app():
+    """Build the Typer app on first use"""
+    from ipecmd_wrapper.cli import app
+
+    return app
 
 
 @pytest.mark.unit
@@ -19,15 +56,6 @@ from ipecmd_wrapper.cli import ToolChoice, VersionChoice, app
 class TestTyperCLI:
     """Test Typer CLI functionality"""
 
-    def setup_method(self):
-        """Set up test fixtures"""
-        self.runner = CliRunner()
-        # Create a temporary hex file for testing
-        self.temp_dir = tempfile.mkdtemp()
-        self.test_hex_file = os.path.join(self.temp_dir, "test.hex")
-        with open(self.test_hex_file, "w") as f:
-            f.write(":00000001FF\n")  # Simple Intel hex format
-
     def _get_error_output(self, result):
         """Get error output from CLI result, handling different Typer versions"""
         # Try to get stderr first, fall back to stdout if not available
@@ -36,27 +64,21 @@ class TestTyperCLI:
         except (ValueError, AttributeError):
             return result.stdout
 
-    def teardown_method(self):
-        """Clean up test fixtures"""
-        import shutil
-
-        shutil.rmtree(self.temp_dir)
-
-    def test_help_command(self):
+    def test_help_command(self, runner, cli_app):
         """Test that help command works"""
-        result = self.runner.invoke(app, ["--help"])
+        result = runner.invoke(cli_app, ["--help"])
         assert result.exit_code == 0
         assert "IPECMD wrapper for PIC programming" in result.stdout
 
-    def test_version_command(self):
+    def test_version_command(self, runner, cli_app):
         """Test version command"""
-        result = self.runner.invoke(app, ["--version"])
+        result = runner.invoke(cli_app, ["--version"])
         assert result.exit_code == 0
         assert "ipecmd-wrapper" in result.stdout
 
-    def test_missing_required_arguments(self):
+    def test_missing_required_arguments(self, runner, cli_app):
         """Test CLI with missing required arguments"""
-        result = self.runner.invoke(app, [])
+        result = runner.invoke(cli_app, [])
         assert result.exit_code != 0
         error_output = self._get_error_output(result)
         assert (
@@ -65,33 +87,24 @@ class TestTyperCLI:
             or "usage" in error_output.lower()
         )
 
-    # def test_valid_tool_choices(self):
-    #     """Test that valid tool choices are accepted"""
-    #     for tool in ToolChoice:
-    #         result = self.runner.invoke(
-    #             app,
-    #             [
-    #                 "PIC16F877A",  # part (positional)
-    #                 tool.value,  # tool (positional)
-    #                 "--file",
-    #                 self.test_hex_file,
-    #                 "--power",
-    #                 "5.0",
-    #                 "--test-programmer",
-    #             ],
-    #         )
-    #         # Should not fail due to invalid tool choice
-    #         assert "is not one of" not in result.stdout
-
-    def test_invalid_tool_choice(self):
+    @pytest.mark.parametrize("tool", list(ToolChoice))
+    def test_valid_tool_choice(self, tool):
+        """Test that each valid tool choice passes argv validation
+
+        Calls the validator callback directly; the full Click pipeline is
+        already exercised by the end-to-end invoke tests below.
+        """
+        assert _validate_tool(tool.value) == tool.value
+
+    def test_invalid_tool_choice(self, runner, cli_app, test_hex_file):
         """Test that invalid tool choices are rejected"""
-        result = self.runner.invoke(
-            app,
+        result = runner.invoke(
+            cli_app,
             [
                 "PIC16F877A",  # part (positional)
                 "INVALID",  # tool (invalid, positional)
                 "--file",
-                self.test_hex_file,
+                test_hex_file,
                 "--power",
                 "5.0",
             ],
@@ -104,30 +117,15 @@ class TestTyperCLI:
             or "choose from" in error_output.lower()
         )
 
-    # def test_valid_version_choices(self):
-    #     """Test that valid version choices are accepted"""
-    #     for version in VersionChoice:
-    #         result = self.runner.invoke(
-    #             app,
-    #             [
-    #                 "PIC16F877A",  # part (positional)
-    #                 "PK4",  # tool (positional)
-    #                 "--file",
-    #                 self.test_hex_file,
-    #                 "--power",
-    #                 "5.0",
-    #                 "--ipecmd-version",
-    #                 version.value,
-    #                 "--test-programmer",
-    #             ],
-    #         )
-    #         # Should not fail due to invalid version choice
-    #         assert "is not one of" not in result.stdout
-
-    def test_nonexistent_file_rejected(self):
+    @pytest.mark.parametrize("version", list(VersionChoice))
+    def test_valid_version_choice(self, version):
+        """Test that each valid version choice passes argv validation"""
+        assert _validate_version(version.value) == version.value
+
+    def test_nonexistent_file_rejected(self, runner, cli_app):
         """Test that nonexistent files are rejected"""
-        result = self.runner.invoke(
-            app,
+        result = runner.invoke(
+            cli_app,
             [
                 "PIC16F877A",  # part (positional)
                 "PK4",  # tool (positional)
@@ -146,17 +144,19 @@ class TestTyperCLI:
         )
 
     @patch("ipecmd_wrapper.cli.program_pic")
-    def test_successful_program_call(self, mock_program_pic):
+    def test_successful_program_call(
+        self, mock_program_pic, runner, cli_app, test_hex_file
+    ):
         """Test that program_pic is called with correct arguments"""
-        mock_program_pic.return_value = None
+        mock_program_pic.return_value = 0
 
-        self.runner.invoke(
-            app,
+        runner.invoke(
+            cli_app,
             [
                 "PIC16F877A",  # part (positional)
                 "PK4",  # tool (positional)
                 "--file",
-                self.test_hex_file,
+                test_hex_file,
                 "--power",
                 "5.0",
                 "--ipecmd-version",
@@ -178,7 +178,7 @@ class TestTyperCLI:
         ]  # Get first positional argument (args object)
         assert args.part == "PIC16F877A"
         assert args.tool == "PK4"  # String value from enum
-        assert args.file == self.test_hex_file
+        assert args.file == test_hex_file
         assert args.power == "5.0"  # Converted to string in Args
         assert args.ipecmd_version == "6.20"  # String value from enum
         assert args.memory == "P"
@@ -186,17 +186,19 @@ class TestTyperCLI:
         assert args.erase
 
     @patch("ipecmd_wrapper.cli.program_pic")
-    def test_test_programmer_mode(self, mock_program_pic):
+    def test_test_programmer_mode(
+        self, mock_program_pic, runner, cli_app, test_hex_file
+    ):
         """Test test programmer mode"""
-        mock_program_pic.return_value = None
+        mock_program_pic.return_value = 0
 
-        self.runner.invoke(
-            app,
+        runner.invoke(
+            cli_app,
             [
                 "PIC16F877A",  # part (positional)
                 "PK4",  # tool (positional)
                 "--file",
-                self.test_hex_file,
+                test_hex_file,
                 "--power",
                 "5.0",
                 "--ipecmd-version",
@@ -210,6 +212,84 @@ class TestTyperCLI:
         assert args.test_programmer
 
 
+@pytest.fixture
+def autodetect_env(tmp_path, monkeypatch):
+    """Point autodetection at an isolated install tree and cache file"""
+    base = tmp_path / "mplabx"
+    base.mkdir()
+    monkeypatch.setattr(cli, "_MPLABX_BASE", base)
+    monkeypatch.setattr(cli, "_CACHE_FILE", tmp_path / "cache" / "autodetect.json")
+    monkeypatch.setattr(cli, "_IPECMD_EXE_NAME", "ipecmd")
+    monkeypatch.setattr(cli, "_autodetect_result", None)
+    return base
+
+
+def _install_version(base, version):
+    """Create a fake vX.Y install and return its ipecmd path"""
+    ipecmd = base / f"v{version}" / "mplab_platform" / "mplab_ipe" / "ipecmd"
+    ipecmd.parent.mkdir(parents=True)
+    ipecmd.touch()
+    return str(ipecmd)
+
+
+@pytest.mark.unit
+@pytest.mark.cli
+class TestAutodetect:
+    """Test autodetect_ipecmd and its persistent cache"""
+
+    def test_picks_highest_version(self, autodetect_env):
+        """Test that versions compare numerically, not lexically"""
+        _install_version(autodetect_env, "6.9")
+        expected = _install_version(autodetect_env, "6.15")
+
+        assert cli.autodetect_ipecmd() == ("6.15", expected)
+
+    def test_cache_hit_skips_scan(self, autodetect_env, monkeypatch):
+        """Test that an up-to-date cache file answers without a scan"""
+        expected = _install_version(autodetect_env, "6.20")
+        assert cli.autodetect_ipecmd() == ("6.20", expected)
+
+        # Simulate a fresh process: drop the in-memory memo and make any
+        # directory scan blow up — the JSON cache must answer
+        monkeypatch.setattr(cli, "_autodetect_result", None)
+
+        def _no_scan(path):
+            raise AssertionError("cache miss: directory was scanned")
+
+        monkeypatch.setattr(cli.os, "scandir", _no_scan)
+        assert cli.autodetect_ipecmd() == ("6.20", expected)
+
+    def test_stale_cache_rescans(self, autodetect_env, monkeypatch):
+        """Test that a changed base mtime invalidates the cache file"""
+        _install_version(autodetect_env, "6.15")
+        # Pin an old mtime so the new install below is guaranteed to
+        # move it, regardless of filesystem timestamp granularity
+        os.utime(autodetect_env, ns=(1_000_000_000, 1_000_000_000))
+        assert cli.autodetect_ipecmd()[0] == "6.15"
+
+        expected = _install_version(autodetect_env, "6.20")
+        monkeypatch.setattr(cli, "_autodetect_result", None)
+        assert cli.autodetect_ipecmd() == ("6.20", expected)
+
+    def test_corrupt_cache_falls_back(self, autodetect_env):
+        """Test that an unreadable cache file falls back to scanning"""
+        expected = _install_version(autodetect_env, "6.20")
+        cli._CACHE_FILE.parent.mkdir(parents=True, exist_ok=True)
+        cli._CACHE_FILE.write_text("{not json")
+
+        assert cli.autodetect_ipecmd() == ("6.20", expected)
+
+    def test_refresh_bypasses_caches(self, autodetect_env):
+        """Test that refresh=True ignores both the memo and the file"""
+        _install_version(autodetect_env, "6.15")
+        assert cli.autodetect_ipecmd()[0] == "6.15"
+
+        # Memo and cache file both still say 6.15
+        expected = _install_version(autodetect_env, "6.20")
+        assert cli.autodetect_ipecmd()[0] == "6.15"
+        assert cli.autodetect_ipecmd(refresh=True) == ("6.20", expected)
+
+
 @pytest.mark.unit
 @pytest.mark.cli
 class TestEnums:
@@ -221,23 +301,7 @@ class TestEnums:
         assert ToolChoice.PK4.value == "PK4"
         assert ToolChoice.PK5.value == "PK5"
         # Test that all expected tools are present
-        expected_tools = {
-            "PK3",
-            "PK4",
-            "PK5",
-            "ICD3",
-            "ICD4",
-            "ICD5",
-            "ICE4",
-            "RICE",
-            "SNAP",
-            "PM3",
-            "PKOB",
-            "PKOB4",
-            "J32",
-        }
-        actual_tools = {tool.value for tool in ToolChoice}
-        assert actual_tools == expected_tools
+        assert _ACTUAL_TOOLS == _EXPECTED_TOOLS
 
     def test_version_choice_enum(self):
         """Test VersionChoice enum values"""
@@ -245,9 +309,7 @@ class TestEnums:
         assert VersionChoice.V6_00.value == "6.00"
         assert VersionChoice.V6_25.value == "6.25"
         # Test that all expected versions are present
-        expected_versions = {"5.50", "6.00", "6.05", "6.10", "6.15", "6.20", "6.25"}
-        actual_versions = {version.value for version in VersionChoice}
-        assert actual_versions == expected_versions
+        assert _ACTUAL_VERSIONS == _EXPECTED_VERSIONS
 
 
 if __name__ == "__main__":
@@ -4,7 +4,10 @@ Tests for IPECMD Wrapper Core
 Basic test suite for the IPECMD wrapper core functionality.
 """
 
+import subprocess
 import sys
+from collections import namedtuple
+from types import SimpleNamespace
 from unittest.mock import MagicMock, patch
 
 import pytest
@@ -19,52 +22,44 @@ from ipecmd_wrapper.core import (
     execute_programming,
     get_ipecmd_path,
     program_pic,
+    program_pic_batch,
     validate_hex_file,
     validate_ipecmd,
 )
 
+# Keep this module on one pytest-xdist worker (run with -n auto --dist
+# loadgroup) so the core import is paid once while other files parallelize
+pytestmark = pytest.mark.xdist_group("core")
+
 
 @pytest.mark.unit
 @pytest.mark.core
 class TestIPECMDPath:
     """Test IPECMD path resolution"""
 
-    def test_get_ipecmd_path_with_version(self):
-        """Test getting IPECMD path with version"""
-        path = get_ipecmd_path(version="6.20")
-
-        # Cross-platform expected path - now using string formatting for consistency
-        if sys.platform == "win32":
-            expected_path = (
+    @pytest.mark.parametrize(
+        "platform,expected",
+        [
+            (
+                "win32",
                 "C:/Program Files/Microchip/MPLABX/v6.20/"
-                "mplab_platform/mplab_ipe/ipecmd.exe"
-            )
-        elif sys.platform == "darwin":  # macOS
-            expected_path = (
-                "/Applications/microchip/mplabx/v6.20/mplab_platform/mplab_ipe/ipecmd"
-            )
-        else:  # Linux and other Unix systems
-            expected_path = (
-                "/opt/microchip/mplabx/v6.20/mplab_platform/mplab_ipe/ipecmd"
-            )
-
-        assert path == expected_path
-
-    @patch("sys.platform", "darwin")
-    def test_get_ipecmd_path_macos(self):
-        """Test getting IPECMD path on macOS"""
+                "mplab_platform/mplab_ipe/ipecmd.exe",
+            ),
+            (
+                "darwin",
+                "/Applications/microchip/mplabx/v6.20/mplab_platform/mplab_ipe/ipecmd",
+            ),
+            (
+                "linux",
+                "/opt/microchip/mplabx/v6.20/mplab_platform/mplab_ipe/ipecmd",
+            ),
+        ],
+    )
+    def test_get_ipecmd_path_platform(self, monkeypatch, platform, expected):
+        """Test getting IPECMD path with version on each platform"""
+        monkeypatch.setattr(sys, "platform", platform)
         path = get_ipecmd_path(version="6.20")
-        expected_path = (
-            "/Applications/microchip/mplabx/v6.20/mplab_platform/mplab_ipe/ipecmd"
-        )
-        assert path == expected_path
-
-    @patch("sys.platform", "linux")
-    def test_get_ipecmd_path_linux(self):
-        """Test getting IPECMD path on Linux"""
-        path = get_ipecmd_path(version="6.20")
-        expected_path = "/opt/microchip/mplabx/v6.20/mplab_platform/mplab_ipe/ipecmd"
-        assert path == expected_path
+        assert path == expected
 
     def test_get_ipecmd_path_with_custom_path(self):
         """Test getting IPECMD path with custom path"""
@@ -85,46 +80,66 @@ class TestIPECMDPath:
 class TestValidation:
     """Test validation functions"""
 
-    @patch("pathlib.Path.exists")
-    def test_validate_ipecmd_exists(self, mock_exists):
-        """Test validation when IPECMD exists"""
-        mock_exists.return_value = True
-        result = validate_ipecmd("fake_path", "v6.20")
-        assert result is True
+    @pytest.mark.parametrize(
+        "exists,expected", [(True, True), (False, False)], ids=["exists", "missing"]
+    )
+    def test_validate_ipecmd(self, monkeypatch, exists, expected):
+        """Test IPECMD validation against file presence"""
+        monkeypatch.setattr("ipecmd_wrapper.core._isfile", lambda p: exists)
+        assert validate_ipecmd("fake_path", "v6.20") is expected
+
+    @pytest.mark.parametrize(
+        "exists,expected", [(True, True), (False, False)], ids=["exists", "missing"]
+    )
+    def test_validate_hex_file(self, monkeypatch, exists, expected):
+        """Test HEX file validation against file presence"""
+        monkeypatch.setattr("ipecmd_wrapper.core._isfile", lambda p: exists)
+        assert validate_hex_file("fake_file.hex") is expected
 
-    @patch("pathlib.Path.exists")
     @patch("ipecmd_wrapper.core.log")
-    def test_validate_ipecmd_not_exists(self, mock_log, mock_exists):
-        """Test validation when IPECMD doesn't exist"""
-        mock_exists.return_value = False
+    def test_validate_ipecmd_not_exists_logs_error(self, mock_log, monkeypatch):
+        """Test that a missing IPECMD is reported"""
+        monkeypatch.setattr("ipecmd_wrapper.core._isfile", lambda p: False)
         result = validate_ipecmd("fake_path", "v6.20")
         assert result is False
         # Check that error messages were logged
         assert mock_log.error.call_count >= 1
 
-    @patch("pathlib.Path.exists")
     @patch("ipecmd_wrapper.core.log")
-    def test_validate_ipecmd_not_exists_custom_path(self, mock_log, mock_exists):
+    def test_validate_ipecmd_not_exists_custom_path(self, mock_log, monkeypatch):
         """Test validation when IPECMD doesn't exist with custom path"""
-        mock_exists.return_value = False
+        monkeypatch.setattr("ipecmd_wrapper.core._isfile", lambda p: False)
         result = validate_ipecmd("fake_path", "custom path")
         assert result is False
         # Check that custom path error message was logged
         mock_log.warning.assert_any_call("Check the provided --ipecmd-path")
 
-    @patch("pathlib.Path.exists")
-    def test_validate_hex_file_exists(self, mock_exists):
-        """Test validation when HEX file exists"""
-        mock_exists.return_value = True
-        result = validate_hex_file("fake_file.hex")
-        assert result is True
-
-    @patch("pathlib.Path.exists")
-    def test_validate_hex_file_not_exists(self, mock_exists):
-        """Test validation when HEX file doesn't exist"""
-        mock_exists.return_value = False
-        result = validate_hex_file("fake_file.hex")
-        assert result is False
+
+# Shared stand-in for subprocess.CompletedProcess; tuple field access is
+# far cheaper than MagicMock attribute dispatch
+_Result = namedtuple("_Result", "returncode stdout stderr", defaults=("", ""))
+
+# Expected argv sequences are constants; build them once as tuples
+_EXPECTED_BASIC = (
+    "ipecmd.exe",
+    "-TPPK3",
+    "-P16F876A",
+    "-Ftest.hex",
+    "-M",
+    "-W5.0",
+)
+_EXPECTED_OPTIONS = (
+    "ipecmd.exe",
+    "-TPPK4",
+    "-P18F4550",
+    "-Fprogram.hex",
+    "-MP",
+    "-YP",
+    "-W3.3",
+    "-E",
+    "-OD",
+    "-OL",
+)
 
 
 @pytest.mark.unit
@@ -132,86 +147,74 @@ class TestValidation:
 class TestCommandBuilding:
     """Test command building functionality"""
 
-    def test_build_ipecmd_command_basic(self):
-        """Test building basic IPECMD command"""
-        # Mock args object
-        args = MagicMock()
-        args.tool = "PK3"
-        args.part = "PIC16F876A"
-        args.file = "test.hex"
-        args.memory = ""
-        args.verify = ""
-        args.power = "5.0"
-        args.erase = False
-        args.vdd_first = False
-        args.logout = False
-
-        cmd_args = build_ipecmd_command(args, "ipecmd.exe")
-
-        expected_args = [
-            "ipecmd.exe",
-            "-TPPK3",
-            "-P16F876A",
-            "-Ftest.hex",
-            "-M",
-            "-W5.0",
-        ]
-
-        assert cmd_args == expected_args
-
-    def test_build_ipecmd_command_with_options(self):
-        """Test building IPECMD command with additional options"""
-        # Mock args object
-        args = MagicMock()
-        args.tool = "PK4"
-        args.part = "PIC18F4550"
-        args.file = "program.hex"
-        args.memory = "P"
-        args.verify = "P"
-        args.power = "3.3"
-        args.erase = True
-        args.vdd_first = True
-        args.logout = True
-
-        cmd_args = build_ipecmd_command(args, "ipecmd.exe")
-
-        expected_args = [
-            "ipecmd.exe",
-            "-TPPK4",
-            "-P18F4550",
-            "-Fprogram.hex",
-            "-MP",
-            "-YP",
-            "-W3.3",
-            "-E",
-            "-OD",
-            "-OL",
-        ]
-
-        assert cmd_args == expected_args
+    # Baseline argument set; parametrize rows override what differs
+    _DEFAULTS = {
+        "tool": "PK3",
+        "part": "PIC16F876A",
+        "file": "test.hex",
+        "memory": "",
+        "verify": "",
+        "power": "5.0",
+        "erase": False,
+        "vdd_first": False,
+        "logout": False,
+    }
+
+    @pytest.mark.parametrize(
+        "overrides,expected",
+        [
+            ({}, _EXPECTED_BASIC),
+            (
+                {
+                    "tool": "PK4",
+                    "part": "PIC18F4550",
+                    "file": "program.hex",
+                    "memory": "P",
+                    "verify": "P",
+                    "power": "3.3",
+                    "erase": True,
+                    "vdd_first": True,
+                    "logout": True,
+                },
+                _EXPECTED_OPTIONS,
+            ),
+        ],
+        ids=["basic", "with_options"],
+    )
+    def test_build_ipecmd_command(self, make_args, overrides, expected):
+        """Test building IPECMD commands with and without options"""
+        args = make_args(**{**self._DEFAULTS, **overrides})
+        assert tuple(build_ipecmd_command(args, "ipecmd.exe")) == expected
 
 
 @pytest.mark.unit
 @pytest.mark.core
-class TestConstants:
-    """Test package constants"""
-
-    def test_tool_choices_not_empty(self):
-        """Test that TOOL_CHOICES is not empty"""
-        assert len(TOOL_CHOICES) > 0
-        assert "PK3" in TOOL_CHOICES
-        assert "PK4" in TOOL_CHOICES
-
-    def test_version_choices_not_empty(self):
-        """Test that VERSION_CHOICES is not empty"""
-        assert len(VERSION_CHOICES) > 0
-        assert "5.50" in VERSION_CHOICES or "6.20" in VERSION_CHOICES
-
-    def test_tool_map_consistency(self):
-        """Test that TOOL_MAP is consistent with TOOL_CHOICES"""
-        for tool in TOOL_CHOICES:
-            assert tool in TOOL_MAP
-            assert TOOL_MAP[tool].startswith("TP")
+@pytest.mark.parametrize(
+    "name,check",
+    [
+        (
+            "TOOL_CHOICES",
+            lambda: len(TOOL_CHOICES) > 0
+            and "PK3" in TOOL_CHOICES
+            and "PK4" in TOOL_CHOICES,
+        ),
+        (
+            "VERSION_CHOICES",
+            lambda: len(VERSION_CHOICES) > 0
+            and ("5.50" in VERSION_CHOICES or "6.20" in VERSION_CHOICES),
+        ),
+        (
+            "TOOL_MAP",
+            lambda: all(
+                tool in TOOL_MAP and TOOL_MAP[tool].startswith("TP")
+                for tool in TOOL_CHOICES
+            ),
+        ),
+    ],
+)
+def test_constant(name, check):
+    """Test package constants (one collection entry, three cases)"""
+    assert check(), name
 
 
 @pytest.mark.unit
@@ -219,38 +222,41 @@ class TestConstants:
 class TestProgrammerDetection:
     """Test programmer detection functionality"""
 
-    @patch("subprocess.run")
-    def test_programmer_detection_success(self, mock_run):
-        """Test successful programmer detection"""
-        mock_result = MagicMock()
-        mock_result.returncode = 0
-        mock_run.return_value = mock_result
-
-        result = detect_programmer("ipecmd.exe", "PIC16F876A", "PK3")
-        assert result is True
-
-    @patch("subprocess.run")
+    @pytest.fixture(autouse=True)
+    def mock_subprocess_run(self, monkeypatch):
+        """Stub subprocess.run for every test in this class"""
+        mock_run = MagicMock()
+        monkeypatch.setattr(subprocess, "run", mock_run)
+        return mock_run
+
+    @pytest.mark.parametrize(
+        "returncode,raises,expected",
+        [
+            pytest.param(0, None, True, id="success"),
+            pytest.param(1, None, False, id="failure"),
+            pytest.param(None, RuntimeError("Test exception"), False, id="exception"),
+        ],
+    )
     @patch("ipecmd_wrapper.core.log")
-    def test_programmer_detection_failure(self, mock_log, mock_run):
-        """Test failed programmer detection"""
-        mock_result = MagicMock()
-        mock_result.returncode = 1
-        mock_result.stderr = "Error message"
-        mock_run.return_value = mock_result
-
-        result = detect_programmer("ipecmd.exe", "PIC16F876A", "PK3")
-        assert result is False
-        # Verify error messages were logged
-        mock_log.error.assert_any_call("Programmer detection failed!")
-        mock_log.warning.assert_any_call("Check programmer connection and try again")
-
-    @patch("subprocess.run")
-    def test_programmer_detection_exception(self, mock_run):
-        """Test programmer detection with exception"""
-        mock_run.side_effect = Exception("Test exception")
+    def test_programmer_detection(
+        self, mock_log, mock_subprocess_run, returncode, raises, expected
+    ):
+        """Test programmer detection across subprocess outcomes"""
+        if raises is not None:
+            mock_subprocess_run.side_effect = raises
+        else:
+            mock_subprocess_run.return_value = _Result(
+                returncode, stderr="Error message"
+            )
 
         result = detect_programmer("ipecmd.exe", "PIC16F876A", "PK3")
-        assert result is False
+        assert result is expected
+        if returncode == 1:
+            # Verify error messages were logged
+            mock_log.error.assert_any_call("Programmer detection failed!")
+            mock_log.warning.assert_any_call(
+                "Check programmer connection and try again"
+            )
 
 
 @pytest.mark.unit
@@ -258,39 +264,34 @@ class TestProgrammerDetection:
 class TestVersionSuggestions:
     """Test version suggestion functionality"""
 
-    def test_get_version_suggestions_latest(self):
-        """Test version suggestions when using latest version"""
-        latest_version = VERSION_CHOICES[-1]
-        suggestions = _get_version_suggestions(latest_version)
-
-        # Should suggest previous version(s) only
+    @pytest.mark.parametrize(
+        "index,require_latest",
+        [
+            pytest.param(-1, False, id="latest"),
+            pytest.param(
+                1,
+                True,
+                id="middle",
+                marks=pytest.mark.skipif(
+                    len(VERSION_CHOICES) < 3, reason="needs at least 3 versions"
+                ),
+            ),
+            pytest.param(0, True, id="first"),
+            pytest.param("invalid", False, id="invalid"),
+        ],
+    )
+    def test_get_version_suggestions(self, index, require_latest):
+        """Test version suggestions across positions in VERSION_CHOICES"""
+        version = "invalid_version" if index == "invalid" else VERSION_CHOICES[index]
+        suggestions = _get_version_suggestions(version)
+
+        # Never more than two alternatives, and never the version itself
         assert len(suggestions) <= 2
-        if len(suggestions) > 0:
-            assert suggestions[0] != latest_version
-
-    def test_get_version_suggestions_middle(self):
-        """Test version suggestions when using middle version"""
-        if len(VERSION_CHOICES) >= 3:
-            middle_version = VERSION_CHOICES[1]
-            suggestions = _get_version_suggestions(middle_version)
-
-            # Should suggest latest and previous/next versions
-            assert len(suggestions) <= 2
+        assert version not in suggestions
+        if require_latest:
             assert VERSION_CHOICES[-1] in suggestions  # Latest should be suggested
-
-    def test_get_version_suggestions_first(self):
-        """Test version suggestions when using first version"""
-        first_version = VERSION_CHOICES[0]
-        suggestions = _get_version_suggestions(first_version)
-
-        # Should suggest latest and next version
-        assert len(suggestions) <= 2
-        assert VERSION_CHOICES[-1] in suggestions  # Latest should be suggested
-
-    def test_get_version_suggestions_invalid(self):
-        """Test version suggestions for invalid version"""
-        suggestions = _get_version_suggestions("invalid_version")
-        assert suggestions == []
+        if index == "invalid":
+            assert suggestions == []
 
 
 @pytest.mark.unit
@@ -298,74 +299,70 @@ class TestVersionSuggestions:
 class TestExecuteProgramming:
     """Test programming execution functionality"""
 
-    @patch("subprocess.run")
+    _CMD_ARGS = ["ipecmd.exe", "-TPPK3", "-PPIC16F876A", "-Ftest.hex"]
+
+    @pytest.fixture(autouse=True)
+    def mock_subprocess_run(self, monkeypatch):
+        """Stub subprocess.run for every test in this class"""
+        mock_run = MagicMock()
+        monkeypatch.setattr(subprocess, "run", mock_run)
+        return mock_run
+
+    @pytest.mark.parametrize(
+        "returncode,raises,version,suggestions,expected,expected_logs",
+        [
+            (0, None, "6.20", None, True, ["SUCCESS! PIC PIC16F876A programmed!"]),
+            (
+                1,
+                None,
+                "6.20",
+                ["6.25", "6.15"],
+                False,
+                [
+                    "You can also try with --ipecmd-version 6.25",
+                    "You can also try with --ipecmd-version 6.15",
+                ],
+            ),
+            (1, None, None, None, False, []),
+            (None, Exception("Command failed"), "6.20", None, False, []),
+        ],
+        ids=["success", "failure_with_suggestions", "failure_no_version", "exception"],
+    )
     @patch("ipecmd_wrapper.core.log")
-    def test_execute_programming_success(self, mock_log, mock_run):
-        """Test successful programming execution"""
-        mock_result = MagicMock()
-        mock_result.returncode = 0
-        mock_result.stdout = "Programming successful"
-        mock_result.stderr = ""
-        mock_run.return_value = mock_result
-
-        cmd_args = ["ipecmd.exe", "-TPPK3", "-PPIC16F876A", "-Ftest.hex"]
-        result = execute_programming(cmd_args, "PIC16F876A", "PK3", "6.20")
-
-        assert result is True
-        mock_log.info.assert_any_call("SUCCESS! PIC PIC16F876A programmed!")
-
-    @patch("subprocess.run")
-    @patch("ipecmd_wrapper.core.log")
-    @patch("ipecmd_wrapper.core._get_version_suggestions")
-    def test_execute_programming_failure_with_suggestions(
-        self, mock_suggestions, mock_log, mock_run
+    def test_execute_programming(
+        self,
+        mock_log,
+        mock_subprocess_run,
+        monkeypatch,
+        returncode,
+        raises,
+        version,
+        suggestions,
+        expected,
+        expected_logs,
     ):
-        """Test failed programming execution with version suggestions"""
-        mock_result = MagicMock()
-        mock_result.returncode = 1
-        mock_result.stdout = ""
-        mock_result.stderr = "Programming failed"
-        mock_run.return_value = mock_result
-
-        mock_suggestions.return_value = ["6.25", "6.15"]
-
-        cmd_args = ["ipecmd.exe", "-TPPK3", "-PPIC16F876A", "-Ftest.hex"]
-        result = execute_programming(cmd_args, "PIC16F876A", "PK3", "6.20")
-
-        assert result is False
-        mock_log.error.assert_any_call("Programming error")
-        mock_log.info.assert_any_call("You can also try with --ipecmd-version 6.25")
-        mock_log.info.assert_any_call("You can also try with --ipecmd-version 6.15")
-
-    @patch("subprocess.run")
-    @patch("ipecmd_wrapper.core.log")
-    def test_execute_programming_failure_no_version(self, mock_log, mock_run):
-        """Test failed programming execution without version info"""
-        mock_result = MagicMock()
-        mock_result.returncode = 1
-        mock_result.stdout = ""
-        mock_result.stderr = "Programming failed"
-        mock_run.return_value = mock_result
-
-        cmd_args = ["ipecmd.exe", "-TPPK3", "-PPIC16F876A", "-Ftest.hex"]
-        result = execute_programming(cmd_args, "PIC16F876A", "PK3", None)
-
-        assert result is False
-        mock_log.error.assert_any_call("Programming error")
-
-    @patch("subprocess.run")
-    @patch("ipecmd_wrapper.core.log")
-    def test_execute_programming_exception(self, mock_log, mock_run):
-        """Test programming execution with exception"""
-        mock_run.side_effect = Exception("Command failed")
+        """Test programming execution across subprocess outcomes"""
+        if raises is not None:
+            mock_subprocess_run.side_effect = raises
+        else:
+            mock_subprocess_run.return_value = _Result(returncode)
+        if suggestions is not None:
+            monkeypatch.setattr(
+                "ipecmd_wrapper.core._get_version_suggestions",
+                lambda current: suggestions,
+            )
 
-        cmd_args = ["ipecmd.exe", "-TPPK3", "-PPIC16F876A", "-Ftest.hex"]
-        result = execute_programming(cmd_args, "PIC16F876A", "PK3", "6.20")
+        result = execute_programming(self._CMD_ARGS, "PIC16F876A", "PK3", version)
 
-        assert result is False
-        mock_log.error.assert_any_call(
-            "Error running programming command: Command failed"
-        )
+        assert result is expected
+        if raises is not None:
+            mock_log.error.assert_any_call(
+                "Error running programming command: Command failed"
+            )
+        elif not expected:
+            mock_log.error.assert_any_call("Programming error")
+        for message in expected_logs:
+            mock_log.info.assert_any_call(message)
 
 
 @pytest.mark.unit
@@ -373,257 +370,153 @@ class TestExecuteProgramming:
 class TestProgramPic:
     """Test main program_pic function"""
 
-    @patch("ipecmd_wrapper.core.validate_hex_file")
-    @patch("ipecmd_wrapper.core.validate_ipecmd")
-    @patch("ipecmd_wrapper.core.get_ipecmd_path")
-    @patch("ipecmd_wrapper.core.detect_programmer")
-    @patch("ipecmd_wrapper.core.build_ipecmd_command")
-    @patch("ipecmd_wrapper.core.execute_programming")
-    @patch("sys.exit")
-    def test_program_pic_success_with_custom_path(
-        self,
-        mock_exit,
-        mock_execute,
-        mock_build,
-        mock_detect,
-        mock_get_path,
-        mock_validate_ipecmd,
-        mock_validate_hex,
-    ):
-        """Test successful program_pic with custom IPECMD path"""
-        # Setup mocks
-        mock_validate_hex.return_value = True
-        mock_validate_ipecmd.return_value = True
-        mock_detect.return_value = True
-        mock_build.return_value = ["ipecmd.exe", "-TPPK3", "-PPIC16F876A", "-Ftest.hex"]
-        mock_execute.return_value = True
+    # Symbols every test in this class stubs out; installed once per test
+    # by the autouse fixture below instead of a @patch stack per method
+    _CORE_FUNCS = (
+        "validate_hex_file",
+        "validate_ipecmd",
+        "get_ipecmd_path",
+        "detect_programmer",
+        "build_ipecmd_command",
+        "execute_programming",
+    )
+
+    @pytest.fixture(autouse=True)
+    def core_mocks(self, monkeypatch):
+        """Stub the core helpers program_pic delegates to"""
+        mocks = SimpleNamespace(
+            **{name: MagicMock(return_value=True) for name in self._CORE_FUNCS}
+        )
+        mocks.get_ipecmd_path.return_value = "/path/ipecmd"
+        mocks.build_ipecmd_command.return_value = [
+            "ipecmd",
+            "-TPPK3",
+            "-PPIC16F876A",
+            "-Ftest.hex",
+        ]
+        for name in self._CORE_FUNCS:
+            monkeypatch.setattr(f"ipecmd_wrapper.core.{name}", getattr(mocks, name))
+        return mocks
+
+    @pytest.fixture
+    def default_args(self):
+        """Fresh argument namespace per test; override what differs"""
+        return SimpleNamespace(
+            ipecmd_path=None,
+            ipecmd_version="6.20",
+            file="test.hex",
+            tool="PK3",
+            part="PIC16F876A",
+            power="5.0",
+            test_programmer=False,
+            memory="",
+            verify="",
+            erase=False,
+            vdd_first=False,
+            logout=False,
+        )
 
-        # Mock args
-        args = MagicMock()
+    def test_program_pic_success_with_custom_path(self, core_mocks, default_args):
+        """Test successful program_pic with custom IPECMD path"""
+        args = default_args
         args.ipecmd_path = "/custom/ipecmd.exe"
-        args.file = "test.hex"
-        args.tool = "PK3"
-        args.part = "PIC16F876A"
-        args.power = "5.0"
         args.test_programmer = True
-        args.ipecmd_version = "6.20"
-        args.memory = ""
-        args.verify = ""
-        args.erase = False
-        args.vdd_first = False
-        args.logout = False
 
-        program_pic(args)
+        assert program_pic(args) == 0
 
         # Verify functions were called
-        mock_validate_hex.assert_called_once_with("test.hex")
-        mock_validate_ipecmd.assert_called_once_with(
+        core_mocks.validate_hex_file.assert_called_once_with("test.hex")
+        core_mocks.validate_ipecmd.assert_called_once_with(
             "/custom/ipecmd.exe", "custom path"
         )
-        mock_detect.assert_called_once()
-        mock_execute.assert_called_once()
-        mock_exit.assert_not_called()
+        core_mocks.detect_programmer.assert_called_once()
+        core_mocks.execute_programming.assert_called_once()
 
-    @patch("ipecmd_wrapper.core.validate_hex_file")
-    @patch("ipecmd_wrapper.core.validate_ipecmd")
-    @patch("ipecmd_wrapper.core.get_ipecmd_path")
-    @patch("ipecmd_wrapper.core.build_ipecmd_command")
-    @patch("ipecmd_wrapper.core.execute_programming")
-    @patch("sys.exit")
-    def test_program_pic_success_with_version(
-        self,
-        mock_exit,
-        mock_execute,
-        mock_build,
-        mock_get_path,
-        mock_validate_ipecmd,
-        mock_validate_hex,
-    ):
+    def test_program_pic_success_with_version(self, core_mocks, default_args):
         """Test successful program_pic with IPECMD version"""
-        # Setup mocks
-        mock_validate_hex.return_value = True
-        mock_validate_ipecmd.return_value = True
-        mock_get_path.return_value = (
+        core_mocks.get_ipecmd_path.return_value = (
             "/opt/microchip/mplabx/v6.20/mplab_platform/mplab_ipe/ipecmd"
         )
-        mock_build.return_value = ["ipecmd", "-TPPK3", "-PPIC16F876A", "-Ftest.hex"]
-        mock_execute.return_value = True
-
-        # Mock args
-        args = MagicMock()
-        args.ipecmd_path = None
-        args.ipecmd_version = "6.20"
-        args.file = "test.hex"
-        args.tool = "PK3"
-        args.part = "PIC16F876A"
-        args.power = "5.0"
-        args.test_programmer = False
-        args.memory = ""
-        args.verify = ""
-        args.erase = False
-        args.vdd_first = False
-        args.logout = False
-
-        program_pic(args)
+
+        assert program_pic(default_args) == 0
 
         # Verify functions were called
-        mock_get_path.assert_called_once_with(version="6.20")
-        mock_validate_ipecmd.assert_called_once_with(
+        core_mocks.get_ipecmd_path.assert_called_once_with(version="6.20")
+        core_mocks.validate_ipecmd.assert_called_once_with(
             "/opt/microchip/mplabx/v6.20/mplab_platform/mplab_ipe/ipecmd", "v6.20"
         )
-        mock_execute.assert_called_once()
-        mock_exit.assert_not_called()
+        core_mocks.execute_programming.assert_called_once()
+
+    @pytest.mark.parametrize(
+        "failing_stage",
+        [
+            "validate_hex_file",
+            "validate_ipecmd",
+            "detect_programmer",
+            "execute_programming",
+        ],
+    )
+    def test_program_pic_stage_failure(self, core_mocks, default_args, failing_stage):
+        """Test that a failure at any stage yields exit code 1"""
+        getattr(core_mocks, failing_stage).return_value = False
+        # Enable detection so every stage in the table actually runs
+        default_args.test_programmer = True
+
+        assert program_pic(default_args) == 1
 
-    @patch("ipecmd_wrapper.core.validate_hex_file")
-    @patch("sys.exit")
-    def test_program_pic_hex_validation_fails(self, mock_exit, mock_validate_hex):
-        """Test program_pic when HEX file validation fails"""
-        mock_validate_hex.return_value = False
-
-        # Mock sys.exit to stop execution
-        mock_exit.side_effect = SystemExit(1)
-
-        args = MagicMock()
-        args.file = "nonexistent.hex"
-        args.tool = "PK3"
-        args.part = "PIC16F876A"
-        args.power = "5.0"
-        args.test_programmer = False
-        args.ipecmd_path = "/path/to/ipecmd"
-        args.ipecmd_version = "6.20"
-        args.memory = ""
-        args.verify = ""
-        args.erase = False
-        args.vdd_first = False
-        args.logout = False
-
-        with pytest.raises(SystemExit):
-            program_pic(args)
-
-        mock_exit.assert_called_once_with(1)
 
-    @patch("ipecmd_wrapper.core.validate_hex_file")
-    @patch("ipecmd_wrapper.core.validate_ipecmd")
-    @patch("ipecmd_wrapper.core.get_ipecmd_path")
-    @patch("sys.exit")
-    def test_program_pic_ipecmd_validation_fails(
-        self, mock_exit, mock_get_path, mock_validate_ipecmd, mock_validate_hex
-    ):
-        """Test program_pic when IPECMD validation fails"""
-        mock_validate_hex.return_value = True
-        mock_validate_ipecmd.return_value = False
-        mock_get_path.return_value = "/invalid/path/ipecmd"
-
-        # Mock sys.exit to stop execution
-        mock_exit.side_effect = SystemExit(1)
-
-        args = MagicMock()
-        args.ipecmd_path = None
-        args.ipecmd_version = "6.20"
-        args.file = "test.hex"
-        args.tool = "PK3"
-        args.part = "PIC16F876A"
-        args.power = "5.0"
-        args.test_programmer = False
-        args.memory = ""
-        args.verify = ""
-        args.erase = False
-        args.vdd_first = False
-        args.logout = False
-
-        with pytest.raises(SystemExit):
-            program_pic(args)
-
-        mock_exit.assert_called_once_with(1)
+@pytest.mark.unit
+@pytest.mark.core
+class TestProgramPicBatch:
+    """Test batch programming helper"""
+
+    def test_program_pic_batch_empty(self):
+        """Test batch programming with an empty device list"""
+        assert program_pic_batch([]) == []
 
+    @patch("ipecmd_wrapper.core.execute_programming")
     @patch("ipecmd_wrapper.core.validate_hex_file")
     @patch("ipecmd_wrapper.core.validate_ipecmd")
-    @patch("ipecmd_wrapper.core.get_ipecmd_path")
-    @patch("ipecmd_wrapper.core.detect_programmer")
-    @patch("sys.exit")
-    def test_program_pic_programmer_detection_fails(
-        self,
-        mock_exit,
-        mock_detect,
-        mock_get_path,
-        mock_validate_ipecmd,
-        mock_validate_hex,
+    def test_program_pic_batch_shares_validated_path(
+        self, mock_validate_ipecmd, mock_validate_hex, mock_execute
     ):
-        """Test program_pic when programmer detection fails"""
-        mock_validate_hex.return_value = True
+        """Test that the IPECMD path is validated once for all devices"""
         mock_validate_ipecmd.return_value = True
-        mock_get_path.return_value = "/path/ipecmd"
-        mock_detect.return_value = False
-
-        # Mock sys.exit to stop execution
-        mock_exit.side_effect = SystemExit(1)
-
-        args = MagicMock()
-        args.ipecmd_path = None
-        args.ipecmd_version = "6.20"
-        args.file = "test.hex"
-        args.tool = "PK3"
-        args.part = "PIC16F876A"
-        args.power = "5.0"
-        args.test_programmer = True
-        args.memory = ""
-        args.verify = ""
-        args.erase = False
-        args.vdd_first = False
-        args.logout = False
+        mock_validate_hex.return_value = True
+        mock_execute.side_effect = [True, False]
+
+        args = SimpleNamespace(
+            ipecmd_path="/custom/ipecmd.exe",
+            ipecmd_version="6.20",
+            file="test.hex",
+            tool="PK3",
+            part="PIC16F876A",
+            power="5.0",
+            memory="",
+            verify="",
+            erase=False,
+            vdd_first=False,
+            logout=False,
+        )
 
-        with pytest.raises(SystemExit):
-            program_pic(args)
+        results = program_pic_batch([args, args])
 
-        mock_exit.assert_called_once_with(1)
+        assert results == [True, False]
+        mock_validate_ipecmd.assert_called_once_with(
+            "/custom/ipecmd.exe", "custom path"
+        )
+        assert mock_execute.call_count == 2
 
-    @patch("ipecmd_wrapper.core.validate_hex_file")
     @patch("ipecmd_wrapper.core.validate_ipecmd")
-    @patch("ipecmd_wrapper.core.get_ipecmd_path")
-    @patch("ipecmd_wrapper.core.build_ipecmd_command")
-    @patch("ipecmd_wrapper.core.execute_programming")
-    @patch("sys.exit")
-    def test_program_pic_programming_fails(
-        self,
-        mock_exit,
-        mock_execute,
-        mock_build,
-        mock_get_path,
-        mock_validate_ipecmd,
-        mock_validate_hex,
-    ):
-        """Test program_pic when programming execution fails"""
-        mock_validate_hex.return_value = True
-        mock_validate_ipecmd.return_value = True
-        mock_get_path.return_value = "/path/ipecmd"
-        mock_build.return_value = ["ipecmd", "-TPPK3", "-PPIC16F876A", "-Ftest.hex"]
-        mock_execute.return_value = False
-
-        # Mock sys.exit to stop execution
-        mock_exit.side_effect = SystemExit(1)
-
-        args = MagicMock()
-        args.ipecmd_path = None
-        args.ipecmd_version = "6.20"
-        args.file = "test.hex"
-        args.tool = "PK3"
-        args.part = "PIC16F876A"
-        args.power = "5.0"
-        args.test_programmer = False
-        args.memory = ""
-        args.verify = ""
-        args.erase = False
-        args.vdd_first = False
-        args.logout = False
+    def test_program_pic_batch_invalid_ipecmd(self, mock_validate_ipecmd):
+        """Test that an invalid IPECMD path fails every device"""
+        mock_validate_ipecmd.return_value = False
 
-        with pytest.raises(SystemExit):
-            program_pic(args)
+        args = SimpleNamespace(ipecmd_path="/missing/ipecmd.exe")
 
-        mock_exit.assert_called_once_with(1)
+        assert program_pic_batch([args, args]) == [False, False]
 
 
-@pytest.mark.unit
-@pytest.mark.core
 @pytest.mark.unit
 @pytest.mark.core
 class TestUtilities:
@@ -632,7 +525,3 @@ class TestUtilities:
     def test_placeholder(self):
         """Placeholder test to keep the class structure"""
         assert True
-
-
-if __name__ == "__main__":
-    pytest.main([__file__])